@@ -1,77 +1,140 @@
 from __future__ import annotations
 
-from collections.abc import Callable, Iterator, Mapping, MutableMapping
+from collections.abc import Callable, Iterator, Mapping
 from contextlib import AbstractContextManager, ExitStack
-from inspect import Parameter
+from inspect import Parameter, ismethod
 from types import TracebackType
-from typing import Any, Self
+from typing import Any, Final, Self
+from weakref import WeakKeyDictionary
 
-from gimme.utils import injectable_signature, is_instance_of_type_hint
+from gimme.utils import (
+    MISSING,
+    InjectionPlan,
+    code_parameters,
+    get_or_build,
+    injectable_signature,
+    type_hint_origin,
+)
+
+_plan_cache = WeakKeyDictionary[Callable[..., Any], InjectionPlan]()
+
+_KIND_CM: Final = 0
+_KIND_ITER: Final = 1
+_KIND_CALLABLE: Final = 2
+_KIND_VALUE: Final = 3
+
+_kind_cache = WeakKeyDictionary[type, int]()
+
+# Type hint origins that every value of the matching kind is an instance of.
+_KIND_ORIGINS: Final[tuple[Any, ...]] = (AbstractContextManager, Iterator, Callable)
+
+# A provider together with how to unwrap it for its key and, for callables,
+# its injection plan.
+type _Resolution = tuple[Any, int, InjectionPlan | None]
 
 
 class Injector:
     _providers: Mapping[Any, Any]
+    _resolutions: dict[Any, _Resolution]
 
     def __init__(self, providers: Mapping[Any, Any]) -> None:
-        self._providers = {**providers, Injector: self}
+        # Providers are resolved lazily and the resolutions are reused across
+        # runs, so the mapping must not be changed after this point.
+        self._providers = providers
+        self._resolutions = {}
 
     def run[R](self, function: Callable[..., R]) -> R:
-        with _InjectorContext(self._providers) as in_context:
+        with _InjectorContext(self._providers, self._resolutions, self) as in_context:
             return in_context.call_with_injection(function)
 
 
 class _InjectorContext(AbstractContextManager["_InjectorContext"]):
-    _exit_stack: ExitStack
-    _cached_dependencies: MutableMapping[Any, Any]
+    _providers: Mapping[Any, Any]
+    _resolutions: dict[Any, _Resolution]
+    _exit_stack: ExitStack | None
+    _cached_dependencies: dict[Any, Any]
 
-    def __init__(self, providers: Mapping[Any, Any]) -> None:
+    def __init__(
+        self,
+        providers: Mapping[Any, Any],
+        resolutions: dict[Any, _Resolution],
+        injector: Injector,
+    ) -> None:
         self._providers = providers
-        self._exit_stack = ExitStack()
-        self._cached_dependencies = {}
+        self._resolutions = resolutions
+        # Created on demand, so runs without context managers skip it entirely.
+        self._exit_stack = None
+        self._cached_dependencies = {Injector: injector}
 
     def call_with_injection[R](self, function: Callable[..., R]) -> R:
-        args = []
-        kwargs = {}
-        signature = injectable_signature(function)
+        return self._call_with_plan(function, injection_plan(function))
 
-        for parameter in signature.parameters.values():
-            value = self.provide(parameter.annotation)
+    def _call_with_plan[R](
+        self,
+        function: Callable[..., R],
+        plan: InjectionPlan,
+    ) -> R:
+        positional, keyword = plan
+        args = [self.provide(annotation) for annotation in positional]
 
-            match parameter.kind:
-                case Parameter.POSITIONAL_OR_KEYWORD | Parameter.POSITIONAL_ONLY:
-                    args.append(value)
-                case Parameter.KEYWORD_ONLY:
-                    kwargs[parameter.name] = value
+        if not keyword:
+            return function(*args)
 
+        kwargs = {name: self.provide(annotation) for name, annotation in keyword}
         return function(*args, **kwargs)
 
     def provide(self, key: Any) -> Any:
-        if key in self._cached_dependencies:
-            return self._cached_dependencies[key]
+        cached = self._cached_dependencies.get(key, MISSING)
+        if cached is not MISSING:
+            return cached
 
-        provider = self._providers.get(key, key)
-        value = self.unwrap(provider, key)
+        resolution = self._resolutions.get(key)
+        if resolution is None:
+            resolution = self._resolutions[key] = self._resolve(key)
+
+        provider, kind, plan = resolution
+        value = self._unwrap_as(provider, kind, plan, key)
 
         self._cached_dependencies[key] = value
         return value
 
+    def _resolve(self, key: Any) -> _Resolution:
+        provider = self._providers.get(key, MISSING)
+        if provider is MISSING:
+            # Unregistered keys are provided by the key itself, which still goes
+            # through the type check, so annotations such as TypeVars are rejected.
+            provider = key
+            kind = _unwrap_kind_for(provider, key, check_values=True)
+        else:
+            kind = _unwrap_kind_for(provider, key)
+        plan = injection_plan(provider) if kind == _KIND_CALLABLE else None
+        return provider, kind, plan
+
     def unwrap(self, value: Any, key: Any) -> Any:
-        if is_instance_of_type_hint(value, key):
-            return value
+        return self._unwrap_as(value, _unwrap_kind_for(value, key), None, key)
 
-        match value:
-            case AbstractContextManager() as context_manager:
-                return self._exit_stack.enter_context(context_manager)
-            case Iterator() as iterator:
-                return next(iterator)
-            case Callable() as function:
-                result = self.call_with_injection(function)
-                return self.unwrap(result, key)
-            case _:
-                return value
+    def _unwrap_as(
+        self,
+        value: Any,
+        kind: int,
+        plan: InjectionPlan | None,
+        key: Any,
+    ) -> Any:
+        if kind == _KIND_VALUE:
+            return value
+        if kind == _KIND_CM:
+            if self._exit_stack is None:
+                self._exit_stack = ExitStack()
+            return self._exit_stack.enter_context(value)
+        if kind == _KIND_ITER:
+            return next(value)
+
+        if plan is None:
+            plan = injection_plan(value)
+        result = self._call_with_plan(value, plan)
+        return self.unwrap(result, key)
 
     def __enter__(self) -> Self:
-        self._exit_stack.__enter__()
         return self
 
     def __exit__(
@@ -82,4 +145,65 @@ class _InjectorContext(AbstractContextManager["_InjectorContext"]):
         /,
     ) -> bool | None:
         self._cached_dependencies.clear()
+        if self._exit_stack is None:
+            return None
         return self._exit_stack.__exit__(exc_type, exc_value, traceback)
+
+
+def _unwrap_kind_for(value: Any, key: Any, *, check_values: bool = False) -> int:
+    value_type = type(value)
+    kind = _kind_cache.get(value_type)
+    if kind is None:
+        kind = _kind_cache[value_type] = _unwrap_kind(value)
+
+    # Plain values are injected as-is, whether or not they match the key.
+    if kind == _KIND_VALUE and not check_values:
+        return kind
+
+    # So are context managers, iterators and callables requested as such.
+    origin = type_hint_origin(key)
+    if kind != _KIND_VALUE and origin is _KIND_ORIGINS[kind]:
+        return _KIND_VALUE
+    if isinstance(value, origin):
+        return _KIND_VALUE
+
+    return kind
+
+
+def _unwrap_kind(value: Any) -> int:
+    if isinstance(value, AbstractContextManager):
+        return _KIND_CM
+    if isinstance(value, Iterator):
+        return _KIND_ITER
+    if callable(value):
+        return _KIND_CALLABLE
+    return _KIND_VALUE
+
+
+def injection_plan(function: Callable[..., Any]) -> InjectionPlan:
+    return get_or_build(_plan_cache, function, _build_injection_plan)
+
+
+def _build_injection_plan(function: Callable[..., Any]) -> InjectionPlan:
+    # Bound methods forward attribute lookups to their function, whose plan
+    # still includes the bound first parameter.
+    if not ismethod(function):
+        build_plan = getattr(function, "__gimme_plan__", None)
+        if build_plan is not None:
+            return build_plan()
+
+    plan = code_parameters(function)
+    if plan is not None:
+        return plan
+
+    positional: list[Any] = []
+    keyword: list[tuple[str, Any]] = []
+
+    for parameter in injectable_signature(function).parameters.values():
+        match parameter.kind:
+            case Parameter.POSITIONAL_OR_KEYWORD | Parameter.POSITIONAL_ONLY:
+                positional.append(parameter.annotation)
+            case Parameter.KEYWORD_ONLY:
+                keyword.append((parameter.name, parameter.annotation))
+
+    return tuple(positional), tuple(keyword)
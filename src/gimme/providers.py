@@ -1,36 +1,31 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from dataclasses import dataclass
+from functools import wraps
 from inspect import Parameter, signature
-from typing import Concatenate
-from weakref import WeakKeyDictionary
+from typing import Any, Concatenate, cast
+from weakref import finalize
 
-from gimme.injectors import Injector
-
-
-@dataclass(slots=True)
-class _Cached[T]:
-    value: T
+from gimme.injectors import Injector, injection_plan
+from gimme.utils import MISSING, InjectionPlan
 
 
 def singleton[**P, R](
     function: Callable[P, R],
     /,
 ) -> Callable[P, R]:
-    cached: _Cached[R] | None = None
+    cached: R | object = MISSING
 
+    @wraps(function, updated=())
     def provider(*args: P.args, **kwargs: P.kwargs) -> R:
         nonlocal cached
-        if cached is not None:
-            return cached.value
+        if cached is MISSING:
+            cached = function(*args, **kwargs)
 
-        result = function(*args, **kwargs)
-        cached = _Cached(result)
-        return result
+        return cast("R", cached)
 
     provider.__annotations__ = function.__annotations__.copy()
-    provider.__signature__ = signature(function)  # type: ignore
+    _attach_injection_plan(provider, function)
 
     return provider
 
@@ -39,14 +34,19 @@ def injector_local[**P, R](
     function: Callable[P, R],
     /,
 ) -> Callable[Concatenate[Injector, P], R]:
-    cache = WeakKeyDictionary[Injector, R]()
+    # Keyed by id() rather than through a WeakKeyDictionary to keep hits cheap;
+    # the finalizer drops the entry before the id can be reused.
+    cache: dict[int, R] = {}
 
     def provider(injector__: Injector, *args: P.args, **kwargs: P.kwargs) -> R:
-        if injector__ in cache:
-            return cache[injector__]
-
-        result = function(*args, **kwargs)
-        cache[injector__] = result
+        key = id(injector__)
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+
+        result = cache[key] = function(*args, **kwargs)
+        finalize(injector__, cache.pop, key, None)
         return result
 
     original_signature = signature(function)
@@ -60,5 +60,21 @@ def injector_local[**P, R](
     provider.__annotations__ = function.__annotations__.copy()
     provider.__annotations__["injector__"] = Injector
     provider.__signature__ = updated_signature  # type: ignore
+    _attach_injection_plan(provider, function, Injector)
 
     return provider
+
+
+def _attach_injection_plan(
+    provider: Callable[..., Any],
+    function: Callable[..., Any],
+    *leading_annotations: Any,
+) -> None:
+    # Lets the injector derive the provider's plan from the wrapped function
+    # instead of inspecting the provider. Nothing is evaluated until first use,
+    # so annotations that cannot be resolved yet do not break decoration.
+    def build_plan() -> InjectionPlan:
+        positional, keyword = injection_plan(function)
+        return (*leading_annotations, *positional), keyword
+
+    provider.__gimme_plan__ = build_plan  # type: ignore
@@ -1,8 +1,93 @@
 from __future__ import annotations
 
 from collections.abc import Callable
-from inspect import Signature, get_annotations, isclass, isfunction, ismethod, signature
-from typing import Any, get_origin
+from inspect import (
+    CO_VARARGS,
+    CO_VARKEYWORDS,
+    Signature,
+    get_annotations,
+    isclass,
+    isfunction,
+    ismethod,
+    signature,
+)
+from typing import Any, Final, get_origin
+from weakref import WeakKeyDictionary
+
+# Marks a missing value where None is a valid one.
+MISSING: Final = object()
+
+_origin_cache = WeakKeyDictionary[Any, Any]()
+
+
+def get_or_build[K, V](
+    cache: WeakKeyDictionary[K, V],
+    key: K,
+    build: Callable[[K], V],
+) -> V:
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable or not weak-referenceable keys are never cached.
+        return build(key)
+
+    result = build(key)
+    cache[key] = result
+    return result
+
+
+# Annotations of positional parameters, then (name, annotation) pairs of
+# keyword-only parameters.
+type InjectionPlan = tuple[tuple[Any, ...], tuple[tuple[str, Any], ...]]
+
+
+def code_parameters(instance: Any) -> InjectionPlan | None:
+    # Reads positional annotations and keyword-only (name, annotation) pairs
+    # straight from the code object of a plain function, method or class
+    # `__init__`, which is much cheaper than building a Signature. Returns
+    # None whenever `inspect.signature` could see something else.
+    if isclass(instance):
+        target = instance.__init__
+        drop_self = True
+    elif ismethod(instance):
+        target = instance.__func__
+        drop_self = True
+    elif isfunction(instance):
+        target = instance
+        drop_self = False
+    else:
+        return None
+
+    if (
+        not isfunction(target)
+        or hasattr(target, "__signature__")
+        or hasattr(target, "__wrapped__")
+    ):
+        return None
+
+    code = target.__code__
+    if code.co_flags & (CO_VARARGS | CO_VARKEYWORDS):
+        return None
+
+    names = code.co_varnames
+    positional_end = code.co_argcount
+    keyword_end = positional_end + code.co_kwonlyargcount
+
+    if drop_self:
+        if positional_end == 0 or names[0] not in ("self", "cls"):
+            return None
+        positional_start = 1
+    else:
+        positional_start = 0
+
+    type_hints = get_annotations(target, eval_str=True)
+
+    return (
+        tuple(type_hints[name] for name in names[positional_start:positional_end]),
+        tuple((name, type_hints[name]) for name in names[positional_end:keyword_end]),
+    )
 
 
 def injectable_signature(instance: Any) -> Signature:
@@ -38,8 +123,15 @@ def injectable_signature(instance: Any) -> Signature:
 
 
 def is_instance_of_type_hint(instance: Any, type_hint: Any) -> bool:
-    origin = get_origin(type_hint) or type_hint
-    return isinstance(instance, origin)
+    return isinstance(instance, type_hint_origin(type_hint))
+
+
+def type_hint_origin(type_hint: Any) -> Any:
+    return get_or_build(_origin_cache, type_hint, _build_type_hint_origin)
+
+
+def _build_type_hint_origin(type_hint: Any) -> Any:
+    return get_origin(type_hint) or type_hint
 
 
 def get(type_: Any) -> Callable[[Any], Any]:
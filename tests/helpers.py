@@ -1,5 +1,10 @@
 from __future__ import annotations
 
+from types import SimpleNamespace
+
+# Types assigned by tests only after providers that refer to them are decorated.
+late_types = SimpleNamespace()
+
 
 class ClassThatNeedsInt:
     value: int
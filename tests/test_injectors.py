@@ -1,11 +1,14 @@
 from collections.abc import Callable, Iterator
 from contextlib import AbstractContextManager, contextmanager
+from functools import wraps
 from itertools import count
 
+import pytest
+
 from gimme.injectors import Injector
 from gimme.providers import injector_local, singleton
-from gimme.utils import get
-from tests.helpers import AnotherClassThatNeedsInt, ClassThatNeedsInt
+from gimme.utils import code_parameters, get
+from tests.helpers import AnotherClassThatNeedsInt, ClassThatNeedsInt, late_types
 
 
 def test_inject_instances_of_primitive_types() -> None:
@@ -256,3 +259,229 @@ def test_inject_parameter_that_needs_two_callables() -> None:
     injector = Injector(providers)
 
     assert injector.run(get(int)) == 123
+
+
+def test_use_unhashable_callable_as_provider() -> None:
+    class UnhashableProvider:
+        __hash__ = None  # type: ignore
+
+        def __call__(self, s: str) -> int:
+            return int(s)
+
+    providers = {}
+    providers[str] = "123"
+    providers[int] = UnhashableProvider()
+
+    injector = Injector(providers)
+
+    assert injector.run(get(int)) == 123
+    assert injector.run(get(int)) == 123
+
+
+def test_inject_injector_itself() -> None:
+    injector = Injector({})
+
+    assert injector.run(get(Injector)) is injector
+
+
+def test_provide_keyword_only_dependency_to_class_constructor() -> None:
+    class ClassThatNeedsKeywordOnlyInt:
+        def __init__(self, s: str, *, value: int) -> None:
+            self.value = int(s) + value
+
+    providers = {}
+    providers[str] = "1"
+    providers[int] = 2
+
+    injector = Injector(providers)
+
+    result = injector.run(get(ClassThatNeedsKeywordOnlyInt))
+    assert result.value == 3
+
+
+def test_inject_singleton_that_returns_none() -> None:
+    calls_count = 0
+
+    def provide_nothing() -> None:
+        nonlocal calls_count
+        calls_count += 1
+
+    providers = {}
+    providers[type(None)] = singleton(provide_nothing)
+
+    injector = Injector(providers)
+    assert injector.run(get(type(None))) is None
+    assert injector.run(get(type(None))) is None
+
+    assert calls_count == 1
+
+
+def test_injector_local_cache_is_released_with_injector() -> None:
+    iterator = count()
+
+    def next_number() -> int:
+        return next(iterator)
+
+    providers = {}
+    providers[int] = injector_local(next_number)
+
+    for expected in range(3):
+        injector = Injector(providers)
+        assert injector.run(get(int)) == expected
+        del injector
+
+
+def test_inject_iterator_created_by_provider() -> None:
+    def provide_numbers() -> Iterator[int]:
+        yield from (1, 2, 3)
+
+    providers = {}
+    providers[Iterator[int]] = provide_numbers
+
+    injector = Injector(providers)
+
+    assert list(injector.run(get(Iterator[int]))) == [1, 2, 3]
+
+
+def test_context_scoped_dependency_is_closed_after_run() -> None:
+    events = []
+
+    @contextmanager
+    def provide_session() -> Iterator[str]:
+        events.append("open")
+        try:
+            yield "session"
+        finally:
+            events.append("close")
+
+    def use_session(session: str) -> str:
+        events.append("use")
+        return session
+
+    providers = {}
+    providers[str] = provide_session
+
+    injector = Injector(providers)
+
+    assert injector.run(use_session) == "session"
+    assert events == ["open", "use", "close"]
+
+
+def test_reject_unregistered_type_variable() -> None:
+    def needs_value[T](value: T) -> T:
+        return value
+
+    injector = Injector({})
+
+    with pytest.raises(TypeError):
+        injector.run(needs_value)
+
+
+def test_reject_unregistered_none() -> None:
+    def needs_none(value: None) -> None:
+        return value
+
+    injector = Injector({})
+
+    with pytest.raises(TypeError):
+        injector.run(needs_none)
+
+
+def test_inject_singleton_class() -> None:
+    providers = {}
+    providers[int] = 1
+    providers[ClassThatNeedsInt] = singleton(ClassThatNeedsInt)
+
+    injector = Injector(providers)
+    first = injector.run(get(ClassThatNeedsInt))
+    assert first.value == 1
+
+    another_injector = Injector(providers)
+    assert another_injector.run(get(ClassThatNeedsInt)) is first
+
+
+def test_decorated_providers_resolve_annotations_on_first_use(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def parse_int(s: "late_types.Value") -> int:
+        return int(s)
+
+    def parse_float(s: "late_types.Value") -> float:
+        return float(s)
+
+    providers = {}
+    providers[int] = singleton(parse_int)
+    providers[float] = injector_local(parse_float)
+
+    monkeypatch.setattr(late_types, "Value", str, raising=False)
+    providers[str] = "1"
+
+    injector = Injector(providers)
+
+    assert injector.run(get(int)) == 1
+    assert injector.run(get(float)) == 1.0
+
+
+def test_inject_positional_only_and_keyword_only_parameters() -> None:
+    def describe(number: int, /, *, text: str) -> str:
+        return f"{text}{number}"
+
+    providers = {}
+    providers[int] = 1
+    providers[str] = "number "
+
+    injector = Injector(providers)
+
+    assert injector.run(describe) == "number 1"
+
+
+def test_inject_bound_method_without_self_parameter_name() -> None:
+    class Parser:
+        def parse(this, s: str) -> int:  # noqa: N805
+            return int(s)
+
+    providers = {}
+    providers[str] = "123"
+
+    injector = Injector(providers)
+
+    assert injector.run(Parser().parse) == 123
+
+
+def test_inject_wrapped_function() -> None:
+    def parse(s: str) -> int:
+        return int(s)
+
+    @wraps(parse)
+    def wrapper(*args: str, **kwargs: str) -> int:
+        return parse(*args, **kwargs)
+
+    providers = {}
+    providers[str] = "123"
+
+    injector = Injector(providers)
+
+    assert code_parameters(wrapper) is None
+    assert injector.run(wrapper) == 123
+
+
+def test_singleton_does_not_copy_wrapped_attributes() -> None:
+    provider = singleton(ClassThatNeedsInt)
+
+    assert "__init__" not in vars(provider)
+    assert provider.__annotations__ is not ClassThatNeedsInt.__annotations__
+
+
+def test_use_singleton_method_as_provider() -> None:
+    class Factory:
+        @singleton
+        def make(self, s: str) -> int:
+            return int(s)
+
+    providers = {}
+    providers[str] = "12"
+    providers[int] = Factory().make
+
+    injector = Injector(providers)
+
+    assert injector.run(get(int)) == 12